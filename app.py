@@ -1,9 +1,30 @@
 import streamlit as st
 import re
+import hashlib
 import json
+from bisect import bisect_right
+from collections import defaultdict
 from datetime import datetime
+from itertools import accumulate
+import numpy as np
+import pandas as pd
 import PyPDF2
-from io import BytesIO
+from io import BytesIO, StringIO
+
+try:
+    import ahocorasick
+except ImportError:  # fall back to the compiled regex scanner
+    ahocorasick = None
+
+try:
+    import pymupdf
+except ImportError:  # fall back to PyPDF2 for text extraction
+    pymupdf = None
+
+try:
+    import orjson
+except ImportError:  # fall back to the standard library JSON encoder
+    orjson = None
 
 # Risk detection patterns and keywords
 RISK_PATTERNS = {
@@ -65,14 +86,124 @@ RISK_PATTERNS = {
     }
 }
 
-def extract_text_from_pdf(pdf_file):
-    """Extract text from uploaded PDF file."""
+# Risk levels from most to least severe
+RISK_LEVELS = ('High', 'Medium', 'Low')
+
+# Template redlines per risk type, as displayed (e.g. 'Intellectual Property')
+REDLINE_SUGGESTIONS = {
+    'Liability': 'SUGGESTED REDLINE: "Party\'s total liability under this Agreement shall be limited to direct damages only and shall not exceed the total fees paid by Client in the twelve (12) months preceding the claim."',
+    'Termination': 'SUGGESTED REDLINE: "Either party may terminate this Agreement for convenience upon ninety (90) days prior written notice. In case of material breach, termination may occur with thirty (30) days notice and opportunity to cure."',
+    'Intellectual Property': 'SUGGESTED REDLINE: "Client shall own IP specifically created for this project. Provider retains ownership of pre-existing IP, tools, methodologies, and any general knowledge or experience gained."',
+    'Confidentiality': 'SUGGESTED REDLINE: "Confidentiality obligations shall survive for three (3) years following termination, except for information that: (a) is publicly available, (b) was known prior to disclosure, or (c) is independently developed."',
+    'Payment': 'SUGGESTED REDLINE: "Payment shall be made in installments based on project milestones: 30% upon signing, 40% upon milestone completion, 30% upon final delivery and acceptance."',
+    'Warranty': 'SUGGESTED REDLINE: "Provider warrants that deliverables will conform to specifications and be fit for their intended purpose for ninety (90) days. Provider will remedy any defects at no additional cost during this period."',
+    'Dispute Resolution': 'SUGGESTED REDLINE: "Disputes shall first be addressed through good-faith negotiation, followed by mediation if necessary. If unresolved, disputes may proceed to arbitration under mutually agreed rules in a neutral jurisdiction."',
+    'Force Majeure': 'SUGGESTED REDLINE: "Neither party shall be liable for delays or failures due to force majeure events including natural disasters, pandemics, war, government actions, or other events beyond reasonable control."'
+}
+
+DEFAULT_REDLINE = 'No specific redline suggestion available.'
+
+# Text report sections, written once per flagged clause and once per risk
+REPORT_CLAUSE_TEMPLATE = "\n\nCLAUSE #{id}\nText: {snippet}...\nRisks: {risk_count}\n"
+REPORT_RISK_TEMPLATE = "\n  - {type} ({risk_level})\n    Rationale: {rationale}\n    Suggestion: {suggestion}\n"
+
+# Detected risk entries per category with everything but the matched keywords filled in
+_RISK_ENTRY_TEMPLATES = {
+    risk_type: {
+        'type': risk_type.replace('_', ' ').title(),
+        'risk_level': risk_data['risk_level'],
+        'matched_keywords': None,
+        'rationale': risk_data['rationale'],
+        'suggestion': risk_data['suggestion']
+    }
+    for risk_type, risk_data in RISK_PATTERNS.items()
+}
+
+# Keywords are constant, so lowercase them once for every scanner
+_RISK_KEYWORDS_LC = {
+    risk_type: [kw.lower() for kw in risk_data['keywords']]
+    for risk_type, risk_data in RISK_PATTERNS.items()
+}
+
+# Inflection endings a keyword may carry and still count as whole-word, e.g. "indefinitely"
+KEYWORD_SUFFIXES = ('s', 'es', 'ly', 'ing')
+
+# Clause expanders rendered per page in the review tab
+CLAUSES_PER_PAGE = 25
+
+# Paragraph breaks or numbered sections start a new clause
+CLAUSE_SPLIT_RE = re.compile(r'\n\s*\n+|\n\s*\d+\.')
+
+def _build_keyword_automaton():
+    """Build one Aho-Corasick automaton over every risk keyword."""
+    automaton = ahocorasick.Automaton()
+    for risk_type, keywords in _RISK_KEYWORDS_LC.items():
+        for kw_index, kw in enumerate(keywords):
+            automaton.add_word(kw, (risk_type, kw_index, len(kw)))
+    automaton.make_automaton()
+    return automaton
+
+# English letters from most to least frequent, for picking selective prefilter anchors
+_LETTER_FREQUENCY_ORDER = 'etaoinshrdlcumwfgypbvkjxqz'
+
+def _rarest_letter(keyword):
+    """Return the least frequent English letter in a lowered keyword."""
+    return max((ch for ch in keyword if ch in _LETTER_FREQUENCY_ORDER), key=_LETTER_FREQUENCY_ORDER.index)
+
+def _build_keyword_regexes():
+    """Compile one union regex per risk category, mapping hits back to keyword indices."""
+    regexes = {}
+    for risk_type, keywords in _RISK_KEYWORDS_LC.items():
+        # Longest first, one group per keyword; the lookahead lets overlapping keywords all match
+        order = sorted(range(len(keywords)), key=lambda i: len(keywords[i]), reverse=True)
+        alternation = '|'.join(f'({re.escape(keywords[i])})' for i in order)
+        suffixes = '|'.join(KEYWORD_SUFFIXES)
+        regex = re.compile(rf'(?=\b(?:{alternation})(?:{suffixes})?\b)', re.IGNORECASE)
+        # Every keyword contains one of these letters, so text lacking all of them can't match
+        letters = {_rarest_letter(kw) for kw in keywords}
+        anchors = frozenset(letters | {letter.upper() for letter in letters})
+        regexes[risk_type] = (regex, order, anchors)
+    return regexes
+
+# Built once at import so each clause is scanned in a single pass
+if ahocorasick is not None:
+    KEYWORD_AUTOMATON = _build_keyword_automaton()
+    KEYWORD_REGEXES = None
+else:
+    KEYWORD_AUTOMATON = None
+    KEYWORD_REGEXES = _build_keyword_regexes()
+
+def _is_word_char(ch):
+    """Check whether ch counts as a word character for keyword boundaries."""
+    return ch.isalnum() or ch == '_'
+
+def _is_whole_word(text, start, end):
+    """Check that text[start:end], optionally inflected, is not part of a longer word."""
+    if start > 0 and _is_word_char(text[start - 1]):
+        return False
+    if end == len(text) or not _is_word_char(text[end]):
+        return True
+    # Accept an inflection ending as long as the word stops right after it
+    return any(
+        text.startswith(suffix, end)
+        and (end + len(suffix) == len(text) or not _is_word_char(text[end + len(suffix)]))
+        for suffix in KEYWORD_SUFFIXES
+    )
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def extract_text_from_pdf(pdf_bytes):
+    """Extract text from the raw bytes of an uploaded PDF file."""
+    # Pages are extracted serially: PyMuPDF is not thread-safe and PyPDF2
+    # parsing holds the GIL, so a thread pool only adds overhead here
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text
+        if pymupdf is not None:
+            with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+                # get_text() already ends each page with a newline; another one
+                # would turn every page break into a clause break
+                return "".join(page.get_text() for page in doc)
+        
+        pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_bytes))
+        return "\n".join(page.extract_text() or "" for page in pdf_reader.pages)
     except Exception as e:
         st.error(f"Error extracting PDF: {str(e)}")
         return None
@@ -80,55 +211,131 @@ def extract_text_from_pdf(pdf_file):
 def segment_into_clauses(text):
     """Segment contract text into clauses/paragraphs."""
     # Split by double newlines or numbered sections
-    paragraphs = re.split(r'\n\s*\n+|\n\s*\d+\.', text)
+    paragraphs = (para.strip() for para in CLAUSE_SPLIT_RE.split(text))
     
-    # Clean and filter
-    clauses = []
-    for i, para in enumerate(paragraphs):
-        cleaned = para.strip()
-        if len(cleaned) > 50:  # Minimum length to be considered a clause
-            clauses.append({
-                'id': i + 1,
-                'text': cleaned,
-                'detected_risks': []
-            })
+    # Keep the paragraph position as the id; only clauses long enough get a dict
+    return [
+        {'id': i, 'text': cleaned, 'detected_risks': []}
+        for i, cleaned in enumerate(paragraphs, start=1)
+        if len(cleaned) > 50  # Minimum length to be considered a clause
+    ]
+
+def _scan_clauses(clause_texts):
+    """Return the matched keywords of each clause as (risk_type, keywords) pairs."""
+    hits = [defaultdict(set) for _ in clause_texts]
     
-    return clauses
+    if KEYWORD_AUTOMATON is not None:
+        # Pack every clause into one buffer so the automaton runs once;
+        # no keyword contains the separator, so no hit can span two clauses
+        buffer = '\x00'.join(clause_texts)
+        starts = list(accumulate((len(text) + 1 for text in clause_texts[:-1]), initial=0))
+        # The automaton is case-sensitive, so lower the whole buffer once if needed
+        if not buffer.islower():
+            lowered = buffer.lower()
+            if len(lowered) != len(buffer):
+                # A few non-ASCII letters (e.g. 'İ') lengthen when lowered, shifting clause starts
+                starts = list(accumulate((len(text.lower()) + 1 for text in clause_texts[:-1]), initial=0))
+            buffer = lowered
+        for end, (risk_type, kw_index, kw_len) in KEYWORD_AUTOMATON.iter(buffer):
+            # Skip hits inside longer words, e.g. "forever" in "forevermore"
+            if _is_whole_word(buffer, end - kw_len + 1, end + 1):
+                hits[bisect_right(starts, end) - 1][risk_type].add(kw_index)
+    else:
+        # Anchors are checked per clause; a whole contract contains every anchor letter
+        clause_chars = [set(text) for text in clause_texts]
+        for risk_type, (regex, order, anchors) in KEYWORD_REGEXES.items():
+            for clause_hits, text, chars in zip(hits, clause_texts, clause_chars):
+                if anchors.isdisjoint(chars):
+                    continue
+                # Case-insensitive matching on the original text; the group number identifies the keyword
+                for match in regex.finditer(text):
+                    clause_hits[risk_type].add(order[match.lastindex - 1])
+    
+    # Report categories and keywords in their declared order, each once
+    return tuple(
+        tuple(
+            (risk_type, tuple(risk_data['keywords'][i] for i in sorted(clause_hits[risk_type])))
+            for risk_type, risk_data in RISK_PATTERNS.items()
+            if risk_type in clause_hits
+        )
+        for clause_hits in hits
+    )
 
-def analyze_clause_risk(clause_text):
-    """Analyze a clause for risk patterns."""
-    clause_lower = clause_text.lower()
+def _detected_risks(clause_matches):
+    """Build the detected risk entries for one clause's matched keywords."""
     detected_risks = []
     
-    for risk_type, risk_data in RISK_PATTERNS.items():
-        # Check if any keywords match
-        matches = [kw for kw in risk_data['keywords'] if kw.lower() in clause_lower]
-        
-        if matches:
-            detected_risks.append({
-                'type': risk_type.replace('_', ' ').title(),
-                'risk_level': risk_data['risk_level'],
-                'matched_keywords': matches,
-                'rationale': risk_data['rationale'],
-                'suggestion': risk_data['suggestion']
-            })
+    for risk_type, matches in clause_matches:
+        # Copy keeps the template's key order; only the matches vary per clause
+        risk = dict(_RISK_ENTRY_TEMPLATES[risk_type])
+        risk['matched_keywords'] = list(matches)
+        detected_risks.append(risk)
     
     return detected_risks
 
-def generate_redline(original_text, risk_type):
-    """Generate redlined version based on risk type."""
-    suggestions = {
-        'Liability': 'SUGGESTED REDLINE: "Party\'s total liability under this Agreement shall be limited to direct damages only and shall not exceed the total fees paid by Client in the twelve (12) months preceding the claim."',
-        'Termination': 'SUGGESTED REDLINE: "Either party may terminate this Agreement for convenience upon ninety (90) days prior written notice. In case of material breach, termination may occur with thirty (30) days notice and opportunity to cure."',
-        'Intellectual Property': 'SUGGESTED REDLINE: "Client shall own IP specifically created for this project. Provider retains ownership of pre-existing IP, tools, methodologies, and any general knowledge or experience gained."',
-        'Confidentiality': 'SUGGESTED REDLINE: "Confidentiality obligations shall survive for three (3) years following termination, except for information that: (a) is publicly available, (b) was known prior to disclosure, or (c) is independently developed."',
-        'Payment': 'SUGGESTED REDLINE: "Payment shall be made in installments based on project milestones: 30% upon signing, 40% upon milestone completion, 30% upon final delivery and acceptance."',
-        'Warranty': 'SUGGESTED REDLINE: "Provider warrants that deliverables will conform to specifications and be fit for their intended purpose for ninety (90) days. Provider will remedy any defects at no additional cost during this period."',
-        'Dispute Resolution': 'SUGGESTED REDLINE: "Disputes shall first be addressed through good-faith negotiation, followed by mediation if necessary. If unresolved, disputes may proceed to arbitration under mutually agreed rules in a neutral jurisdiction."',
-        'Force Majeure': 'SUGGESTED REDLINE: "Neither party shall be liable for delays or failures due to force majeure events including natural disasters, pandemics, war, government actions, or other events beyond reasonable control."'
+def analyze_clause_risk(clause_text):
+    """Analyze a clause for risk patterns."""
+    return _detected_risks(_scan_clauses((clause_text,))[0])
+
+def analyze_clauses(clauses):
+    """Analyze all clauses in a single scan, filling in their detected risks."""
+    all_matches = _scan_clauses(tuple(clause['text'] for clause in clauses))
+    for clause, clause_matches in zip(clauses, all_matches):
+        clause['detected_risks'] = _detected_risks(clause_matches)
+    return clauses
+
+def build_clause_table(clauses):
+    """Build a columnar per-clause summary (id, risk count, one flag per risk level) of analyzed clauses."""
+    # Each clause's risk levels are collected once and feed every flag column
+    clause_levels = [frozenset(r['risk_level'] for r in c['detected_risks']) for c in clauses]
+    clause_table = pd.DataFrame({
+        'id': np.array([c['id'] for c in clauses], dtype=np.int32),
+        'risk_count': np.array([len(c['detected_risks']) for c in clauses], dtype=np.int16),
+    })
+    for level in RISK_LEVELS:
+        clause_table[f'has_{level.lower()}'] = np.array([level in levels for levels in clause_levels], dtype=bool)
+    return clause_table
+
+def summarize_clauses(clause_table):
+    """Compute the summary statistics of analyzed clauses from their clause table."""
+    # Plain ints so the stats stay JSON serializable for the export
+    return {
+        'total_clauses': len(clause_table),
+        'total_risks': int(clause_table['risk_count'].sum()),
+        'high_risk_clauses': int(clause_table['has_high'].sum()),
+    }
+
+def bucket_clauses_by_level(clause_table):
+    """Group the positions of risky clauses by each risk level they contain."""
+    return {
+        level: np.flatnonzero(clause_table[f'has_{level.lower()}']).tolist()
+        for level in RISK_LEVELS
     }
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_analyzed_clauses(contract_key, _contract_text=None):
+    """Return the analyzed clauses of the contract whose content hash is contract_key.
     
-    return suggestions.get(risk_type, 'No specific redline suggestion available.')
+    The text is only needed to populate the cache and is not hashed; later reruns
+    fetch the shared clauses by key, so they must be treated as read-only.
+    """
+    if _contract_text is None:
+        # Never analyzed in this process or evicted; exceptions are not cached
+        raise KeyError(contract_key)
+    return analyze_clauses(segment_into_clauses(_contract_text))
+
+def _session_clauses():
+    """Return the analyzed clauses of this session's contract, or None."""
+    if 'analysis' not in st.session_state:
+        return None
+    try:
+        return get_analyzed_clauses(st.session_state.analysis['key'])
+    except KeyError:
+        return None
+
+def generate_redline(original_text, risk_type):
+    """Generate redlined version based on risk type."""
+    return REDLINE_SUGGESTIONS.get(risk_type, DEFAULT_REDLINE)
 
 def main():
     st.set_page_config(page_title="AI Contract Redlining Assistant", layout="wide")
@@ -138,6 +345,13 @@ def main():
     st.markdown("**Automatically detect risky clauses and get redline suggestions**")
     st.markdown("---")
     
+    # Analyzed clauses live in a cache shared by all sessions, so other users can
+    # evict ours; drop the stale stats too so the sidebar and tabs agree
+    clauses = _session_clauses()
+    if clauses is None and 'analysis' in st.session_state:
+        del st.session_state.analysis
+        st.warning("⚠️ Your previous analysis is no longer available. Please run the analysis again.")
+    
     # Sidebar
     with st.sidebar:
         st.header("📋 About")
@@ -151,11 +365,10 @@ def main():
         )
         
         st.header("📊 Statistics")
-        if 'analyzed_clauses' in st.session_state:
-            st.metric("Clauses Analyzed", len(st.session_state.analyzed_clauses))
-            high_risk = sum(1 for c in st.session_state.analyzed_clauses 
-                          if any(r['risk_level'] == 'High' for r in c['detected_risks']))
-            st.metric("High Risk Clauses", high_risk)
+        if 'analysis' in st.session_state:
+            stats = st.session_state.analysis['stats']
+            st.metric("Clauses Analyzed", stats['total_clauses'])
+            st.metric("High Risk Clauses", stats['high_risk_clauses'])
     
     # Main content
     tab1, tab2, tab3 = st.tabs(["📄 Upload & Analyze", "🔍 Review Results", "💾 Export"])
@@ -171,7 +384,7 @@ def main():
             uploaded_file = st.file_uploader("Upload contract PDF", type=['pdf'])
             if uploaded_file:
                 with st.spinner("Extracting text from PDF..."):
-                    contract_text = extract_text_from_pdf(uploaded_file)
+                    contract_text = extract_text_from_pdf(uploaded_file.getvalue())
                     if contract_text:
                         st.success("✅ PDF extracted successfully!")
                         with st.expander("View extracted text"):
@@ -181,86 +394,93 @@ def main():
         
         if contract_text and st.button("🔍 Analyze Contract", type="primary"):
             with st.spinner("Analyzing contract clauses..."):
-                # Segment into clauses
-                clauses = segment_into_clauses(contract_text)
+                # Segment and analyze once per distinct contract text
+                contract_key = hashlib.sha1(contract_text.encode()).hexdigest()
+                clauses = get_analyzed_clauses(contract_key, contract_text)
                 st.success(f"✅ Identified {len(clauses)} clauses")
                 
-                # Analyze each clause
-                for clause in clauses:
-                    clause['detected_risks'] = analyze_clause_risk(clause['text'])
-                
-                # Store in session state
-                st.session_state.analyzed_clauses = clauses
-                st.session_state.full_text = contract_text
+                # Keep only the lookup key, statistics and level buckets in session state
+                clause_table = build_clause_table(clauses)
+                stats = summarize_clauses(clause_table)
+                st.session_state.analysis = {
+                    'key': contract_key,
+                    'stats': stats,
+                    'buckets': bucket_clauses_by_level(clause_table)
+                }
                 
                 # Show summary
-                total_risks = sum(len(c['detected_risks']) for c in clauses)
-                high_risk_clauses = sum(1 for c in clauses 
-                                       if any(r['risk_level'] == 'High' for r in c['detected_risks']))
-                
                 col1, col2, col3 = st.columns(3)
-                col1.metric("Total Clauses", len(clauses))
-                col2.metric("Risks Detected", total_risks)
-                col3.metric("High Risk Clauses", high_risk_clauses)
+                col1.metric("Total Clauses", stats['total_clauses'])
+                col2.metric("Risks Detected", stats['total_risks'])
+                col3.metric("High Risk Clauses", stats['high_risk_clauses'])
                 
                 st.info("👉 Switch to the 'Review Results' tab to see detailed analysis")
     
     with tab2:
         st.header("Detailed Risk Analysis")
         
-        if 'analyzed_clauses' not in st.session_state:
+        if clauses is None:
             st.warning("⚠️ Please analyze a contract first in the 'Upload & Analyze' tab")
         else:
-            clauses = st.session_state.analyzed_clauses
+            stats = st.session_state.analysis['stats']
             
             # Filter options
             risk_filter = st.multiselect(
                 "Filter by risk level:",
-                ["High", "Medium", "Low"],
-                default=["High", "Medium", "Low"]
+                list(RISK_LEVELS),
+                default=list(RISK_LEVELS)
             )
             
-            # Display clauses
-            for clause in clauses:
-                if clause['detected_risks']:
-                    # Check if clause matches filter
-                    if any(r['risk_level'] in risk_filter for r in clause['detected_risks']):
-                        with st.expander(f"📌 Clause #{clause['id']} - {len(clause['detected_risks'])} risk(s) detected", expanded=False):
-                            st.markdown("**Original Clause:**")
-                            st.text_area("", clause['text'], height=100, key=f"clause_{clause['id']}", disabled=True)
-                            
-                            st.markdown("---")
+            # Display clauses in any selected level bucket, in contract order
+            buckets = st.session_state.analysis['buckets']
+            selected = sorted(set().union(*(buckets[level] for level in risk_filter)))
+            
+            # Only render one page of expanders per rerun
+            page_count = max(1, (len(selected) + CLAUSES_PER_PAGE - 1) // CLAUSES_PER_PAGE)
+            page = 1
+            if page_count > 1:
+                page = st.number_input(f"Page (1-{page_count}):", min_value=1, max_value=page_count, value=1, step=1)
+                st.caption(f"Showing {len(selected)} matching clauses, {CLAUSES_PER_PAGE} per page")
+            start = (page - 1) * CLAUSES_PER_PAGE
+            
+            for clause in (clauses[position] for position in selected[start:start + CLAUSES_PER_PAGE]):
+                with st.expander(f"📌 Clause #{clause['id']} - {len(clause['detected_risks'])} risk(s) detected", expanded=False):
+                    st.markdown("**Original Clause:**")
+                    st.text_area("", clause['text'], height=100, key=f"clause_{clause['id']}", disabled=True)
+                    
+                    st.markdown("---")
+                    
+                    for risk in clause['detected_risks']:
+                        # Risk level badge
+                        color = {"High": "🔴", "Medium": "🟡", "Low": "🟢"}[risk['risk_level']]
+                        st.markdown(f"### {color} {risk['type']} Risk - **{risk['risk_level']}**")
+                        
+                        col1, col2 = st.columns([1, 1])
+                        
+                        with col1:
+                            st.markdown("**🔍 Matched Keywords:**")
+                            st.write(", ".join(f"`{kw}`" for kw in risk['matched_keywords']))
                             
-                            for risk in clause['detected_risks']:
-                                # Risk level badge
-                                color = {"High": "🔴", "Medium": "🟡", "Low": "🟢"}[risk['risk_level']]
-                                st.markdown(f"### {color} {risk['type']} Risk - **{risk['risk_level']}**")
-                                
-                                col1, col2 = st.columns([1, 1])
-                                
-                                with col1:
-                                    st.markdown("**🔍 Matched Keywords:**")
-                                    st.write(", ".join(f"`{kw}`" for kw in risk['matched_keywords']))
-                                    
-                                    st.markdown("**📝 Rationale:**")
-                                    st.write(risk['rationale'])
-                                
-                                with col2:
-                                    st.markdown("**✏️ Suggested Redline:**")
-                                    redline = generate_redline(clause['text'], risk['type'])
-                                    st.info(redline)
-                                
-                                st.markdown("---")
+                            st.markdown("**📝 Rationale:**")
+                            st.write(risk['rationale'])
+                        
+                        with col2:
+                            st.markdown("**✏️ Suggested Redline:**")
+                            redline = REDLINE_SUGGESTIONS.get(risk['type'], DEFAULT_REDLINE)
+                            st.info(redline)
+                        
+                        st.markdown("---")
             
-            if not any(c['detected_risks'] for c in clauses):
+            if stats['total_risks'] == 0:
                 st.success("✅ No significant risks detected in this contract!")
     
     with tab3:
         st.header("Export Results")
         
-        if 'analyzed_clauses' not in st.session_state:
+        if clauses is None:
             st.warning("⚠️ Please analyze a contract first")
         else:
+            stats = st.session_state.analysis['stats']
             st.markdown("### Export Options")
             
             export_format = st.radio("Choose export format:", ["JSON", "Text Report"])
@@ -269,15 +489,18 @@ def main():
                 # Prepare JSON data
                 export_data = {
                     'analysis_date': datetime.now().isoformat(),
-                    'total_clauses': len(st.session_state.analyzed_clauses),
-                    'total_risks': sum(len(c['detected_risks']) for c in st.session_state.analyzed_clauses),
-                    'clauses': st.session_state.analyzed_clauses
+                    'total_clauses': stats['total_clauses'],
+                    'total_risks': stats['total_risks'],
+                    'clauses': clauses
                 }
                 
-                json_str = json.dumps(export_data, indent=2)
+                if orjson is not None:
+                    json_data = orjson.dumps(export_data, option=orjson.OPT_INDENT_2)
+                else:
+                    json_data = json.dumps(export_data, indent=2)
                 st.download_button(
                     label="📥 Download JSON",
-                    data=json_str,
+                    data=json_data,
                     file_name=f"contract_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
                     mime="application/json"
                 )
@@ -287,30 +510,38 @@ def main():
             
             else:
                 # Generate text report
-                report = f"""CONTRACT RISK ANALYSIS REPORT
+                report_buffer = StringIO()
+                report_buffer.write(f"""CONTRACT RISK ANALYSIS REPORT
 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 {'='*80}
 
 SUMMARY
 -------
-Total Clauses Analyzed: {len(st.session_state.analyzed_clauses)}
-Total Risks Detected: {sum(len(c['detected_risks']) for c in st.session_state.analyzed_clauses)}
-High Risk Clauses: {sum(1 for c in st.session_state.analyzed_clauses if any(r['risk_level'] == 'High' for r in c['detected_risks']))}
+Total Clauses Analyzed: {stats['total_clauses']}
+Total Risks Detected: {stats['total_risks']}
+High Risk Clauses: {stats['high_risk_clauses']}
 
 DETAILED FINDINGS
 -----------------
-"""
+""")
                 
-                for clause in st.session_state.analyzed_clauses:
+                for clause in clauses:
                     if clause['detected_risks']:
-                        report += f"\n\nCLAUSE #{clause['id']}\n"
-                        report += f"Text: {clause['text'][:200]}...\n"
-                        report += f"Risks: {len(clause['detected_risks'])}\n"
+                        report_buffer.write(REPORT_CLAUSE_TEMPLATE.format(
+                            id=clause['id'],
+                            snippet=clause['text'][:200],
+                            risk_count=len(clause['detected_risks'])
+                        ))
                         
                         for risk in clause['detected_risks']:
-                            report += f"\n  - {risk['type']} ({risk['risk_level']})\n"
-                            report += f"    Rationale: {risk['rationale']}\n"
-                            report += f"    Suggestion: {generate_redline(clause['text'], risk['type'])}\n"
+                            report_buffer.write(REPORT_RISK_TEMPLATE.format(
+                                type=risk['type'],
+                                risk_level=risk['risk_level'],
+                                rationale=risk['rationale'],
+                                suggestion=REDLINE_SUGGESTIONS.get(risk['type'], DEFAULT_REDLINE)
+                            ))
+                
+                report = report_buffer.getvalue()
                 
                 st.download_button(
                     label="📥 Download Text Report",